@@ -21,6 +21,9 @@ from gns3.qt import QtWidgets
 from gns3.compute import Compute
 from gns3.ui.edit_compute_dialog_ui import Ui_EditComputeDialog
 
+# ASCII plus the Unicode ranges for internationalized hostnames
+_HOST_RE = re.compile("[a-zA-Z0-9\\.\u0370-\u1CDF\u2C00-\u30FF\u4E00-\u9FBF-]+")
+
 
 class EditComputeDialog(QtWidgets.QDialog, Ui_EditComputeDialog):
 
@@ -34,6 +37,12 @@ class EditComputeDialog(QtWidgets.QDialog, Ui_EditComputeDialog):
 
         super().__init__(parent)
         self.setupUi(self)
+        # widgets only visible when authentication is enabled, grouped so
+        # toggling triggers a single layout pass instead of one per widget
+        self._auth_widgets = (self.uiServerUserLabel,
+                              self.uiServerUserLineEdit,
+                              self.uiServerPasswordLabel,
+                              self.uiServerPasswordLineEdit)
         self.uiEnableAuthenticationCheckBox.toggled.connect(self._enableAuthenticationSlot)
         self._compute = compute
         if self._compute:
@@ -57,16 +66,13 @@ class EditComputeDialog(QtWidgets.QDialog, Ui_EditComputeDialog):
         Slot to enable or not the authentication.
         """
 
-        if self.uiEnableAuthenticationCheckBox.isChecked():
-            self.uiServerUserLineEdit.setVisible(True)
-            self.uiServerPasswordLineEdit.setVisible(True)
-            self.uiServerUserLabel.setVisible(True)
-            self.uiServerPasswordLabel.setVisible(True)
-        else:
-            self.uiServerUserLineEdit.setVisible(False)
-            self.uiServerPasswordLineEdit.setVisible(False)
-            self.uiServerUserLabel.setVisible(False)
-            self.uiServerPasswordLabel.setVisible(False)
+        visible = self.uiEnableAuthenticationCheckBox.isChecked()
+        self.setUpdatesEnabled(False)
+        try:
+            for widget in self._auth_widgets:
+                widget.setVisible(visible)
+        finally:
+            self.setUpdatesEnabled(True)
 
     def compute(self):
         return self._compute
@@ -83,9 +89,8 @@ class EditComputeDialog(QtWidgets.QDialog, Ui_EditComputeDialog):
         user = self.uiServerUserLineEdit.text().strip()
         password = self.uiServerPasswordLineEdit.text().strip()
 
-        if not re.match(r"^[a-zA-Z0-9\.{}-]+$".format("\u0370-\u1CDF\u2C00-\u30FF\u4E00-\u9FBF"), host):
-            QtWidgets.QMessageBox.critical(self, "Remote compute", "Invalid remote server hostname {}".format(host))
-            return
+        # run the cheap checks first so invalid inputs never
+        # reach the hostname regex
         if name == "gns3vm":
             QtWidgets.QMessageBox.critical(self, "Remote compute", "{} is a reserved name".format(name))
             return
@@ -95,6 +100,9 @@ class EditComputeDialog(QtWidgets.QDialog, Ui_EditComputeDialog):
         if port is None or port < 1:
             QtWidgets.QMessageBox.critical(self, "Remote compute", "Invalid remote server port {}".format(port))
             return
+        if not _HOST_RE.fullmatch(host):
+            QtWidgets.QMessageBox.critical(self, "Remote compute", "Invalid remote server hostname {}".format(host))
+            return
 
         if not self._compute:
             self._compute = Compute()
@@ -19,8 +19,8 @@ from .qt import sip
 import json
 import copy
 import http
-import uuid
 import pathlib
+import itertools
 import base64
 import datetime
 import ipaddress
@@ -35,6 +35,10 @@ from .utils import parse_version
 import logging
 log = logging.getLogger(__name__)
 
+# query IDs only need to be unique within this process,
+# a counter is much cheaper than uuid.uuid4()
+_query_id_generator = itertools.count()
+
 
 class HttpBadRequest(Exception):
 
@@ -555,7 +559,7 @@ class HTTPClient(QtCore.QObject):
             return
 
         context = copy.copy(context)
-        context["query_id"] = str(uuid.uuid4())
+        context["query_id"] = str(next(_query_id_generator))
 
         response.finished.connect(qpartial(self._processResponse, response, server, callback, context, body, ignoreErrors))
         response.error.connect(qpartial(self._processError, response, server, callback, context, body, ignoreErrors))
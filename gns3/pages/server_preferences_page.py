@@ -22,12 +22,15 @@ Configuration page for server preferences.
 import os
 import sys
 import copy
+import stat
 import shutil
+import time
+import functools
 
 import logging
 log = logging.getLogger(__name__)
 
-from gns3.qt import QtNetwork, QtWidgets
+from gns3.qt import QtCore, QtNetwork, QtWidgets
 from ..ui.server_preferences_page_ui import Ui_ServerPreferencesPageWidget
 from ..topology import Topology
 from ..settings import LOCAL_SERVER_SETTINGS, DEFAULT_LOCAL_SERVER_HOST
@@ -35,6 +38,130 @@ from ..dialogs.edit_compute_dialog import EditComputeDialog
 from ..local_server import LocalServer
 from ..compute_manager import ComputeManager
 
+# options shared by the browse dialogs, built once instead of OR'ing
+# the flags on every click
+_FILE_DIALOG_OPTIONS = QtWidgets.QFileDialog.DontUseCustomDirectoryIcons | QtWidgets.QFileDialog.DontResolveSymlinks
+
+
+@functools.lru_cache(maxsize=1)
+def _local_addresses(ttl_hash):
+    """
+    Enumerates the non link-local IP addresses of this host.
+
+    Interface enumeration is expensive, so the result is cached for a few
+    seconds (ttl_hash changes when the cache must be refreshed).
+
+    :returns: list of IP addresses as strings
+    """
+
+    addresses = []
+    for address in QtNetwork.QNetworkInterface.allAddresses():
+        protocol = address.protocol()
+        if protocol == QtNetwork.QAbstractSocket.IPv4Protocol:
+            link_local_prefix = "169.254"
+        elif protocol == QtNetwork.QAbstractSocket.IPv6Protocol:
+            link_local_prefix = "fe80"
+        else:
+            continue
+        address_string = address.toString()
+        if not address_string.startswith(link_local_prefix):
+            addresses.append(address_string)
+    return addresses
+
+
+class ComputesTableModel(QtCore.QAbstractTableModel):
+
+    """
+    Table model for the remote compute servers, so the view renders rows
+    lazily instead of allocating a widget item per server.
+
+    :param parent: parent object
+    """
+
+    HEADERS = ("Name", "Protocol", "Host", "Port", "User")
+
+    def __init__(self, parent=None):
+
+        super().__init__(parent)
+        self._computes = []
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+
+        if parent.isValid():
+            return 0
+        return len(self._computes)
+
+    def columnCount(self, parent=QtCore.QModelIndex()):
+
+        return len(self.HEADERS)
+
+    def headerData(self, section, orientation, role=QtCore.Qt.DisplayRole):
+
+        if orientation == QtCore.Qt.Horizontal and role == QtCore.Qt.DisplayRole:
+            return self.HEADERS[section]
+        return None
+
+    def data(self, index, role=QtCore.Qt.DisplayRole):
+
+        if index.isValid() and role == QtCore.Qt.DisplayRole:
+            compute = self._computes[index.row()]
+            column = index.column()
+            if column == 0:
+                return compute.name()
+            elif column == 1:
+                return compute.protocol()
+            elif column == 2:
+                return compute.host()
+            elif column == 3:
+                return str(compute.port())
+            elif column == 4:
+                return compute.user()
+        return None
+
+    def compute(self, row):
+        """
+        Returns the compute displayed at the given row.
+
+        :param row: row number
+        :returns: Compute instance
+        """
+
+        return self._computes[row]
+
+    def setComputes(self, computes):
+        """
+        Replaces all the computes displayed by the view.
+
+        :param computes: iterable of Compute instances
+        """
+
+        self.beginResetModel()
+        self._computes = list(computes)
+        self.endResetModel()
+
+    def addCompute(self, compute):
+        """
+        Appends a compute without rebuilding the whole model.
+
+        :param compute: Compute instance
+        """
+
+        row = len(self._computes)
+        self.beginInsertRows(QtCore.QModelIndex(), row, row)
+        self._computes.append(compute)
+        self.endInsertRows()
+
+    def removeCompute(self, row):
+        """
+        Removes the compute displayed at the given row.
+
+        :param row: row number
+        """
+
+        self.beginRemoveRows(QtCore.QModelIndex(), row, row)
+        del self._computes[row]
+        self.endRemoveRows()
+
 
 class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
 
@@ -47,6 +174,11 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
         super().__init__()
         self.setupUi(self)
         self._remote_computes = {}
+        self._remote_compute_keys = set()
+        self._remotes_loaded = False
+        self._remote_computes_model = ComputesTableModel(self)
+        self.uiRemoteServersTreeWidget.setModel(self._remote_computes_model)
+        self.uiServerPreferenceTabWidget.currentChanged.connect(self._loadRemoteComputesIfShown)
 
         # connect the slots
         self.uiLocalServerToolButton.clicked.connect(self._localServerBrowserSlot)
@@ -55,26 +187,37 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
         self.uiDeleteRemoteServerPushButton.clicked.connect(self._remoteServerDeleteSlot)
         self.uiUpdateRemoteServerPushButton.clicked.connect(self._remoteServerUpdateSlot)
 
-        self.uiRemoteServersTreeWidget.itemSelectionChanged.connect(self._remoteServerChangedSlot)
+        self.uiRemoteServersTreeWidget.selectionModel().currentRowChanged.connect(self._remoteServerChangedSlot)
         self.uiRestoreDefaultsPushButton.clicked.connect(self._restoreDefaultsSlot)
         self.uiLocalServerAutoStartCheckBox.stateChanged.connect(self._useLocalServerAutoStartSlot)
 
-        # load all available addresses
-        for address in QtNetwork.QNetworkInterface.allAddresses():
-            if address.protocol() in [QtNetwork.QAbstractSocket.IPv4Protocol, QtNetwork.QAbstractSocket.IPv6Protocol]:
-                address_string = address.toString()
-                if address_string.startswith("169.254") or address_string.startswith("fe80"):
-                    # ignore link-local addresses
-                    continue
-                self.uiLocalServerHostComboBox.addItem(address_string, address_string)
-        self.uiLocalServerHostComboBox.addItem("localhost", "localhost")  # local host
-        self.uiLocalServerHostComboBox.addItem("::", "::")  # all IPv6 addresses
-        self.uiLocalServerHostComboBox.addItem("0.0.0.0", "0.0.0.0")  # all IPv4 addresses
-
-        # default is 127.0.0.1
-        index = self.uiLocalServerHostComboBox.findText(DEFAULT_LOCAL_SERVER_HOST)
-        if index != -1:
-            self.uiLocalServerHostComboBox.setCurrentIndex(index)
+        # load all available addresses followed by the local host
+        # and the all IPv6/IPv4 addresses entries
+        addresses = list(_local_addresses(ttl_hash=round(time.monotonic() / 10)))
+        addresses.extend(("localhost", "::", "0.0.0.0"))
+
+        # the host indexes are recorded while inserting, so neither the
+        # default selection nor _populateWidgets needs a combo box scan
+        self._host_index = {}
+        for index, address_string in enumerate(addresses):
+            self.uiLocalServerHostComboBox.addItem(address_string, address_string)
+            self._host_index.setdefault(address_string, index)
+        default_index = self._host_index.get(DEFAULT_LOCAL_SERVER_HOST, -1)
+        if default_index != -1:
+            self.uiLocalServerHostComboBox.setCurrentIndex(default_index)
+
+        # (settings key, widget getter) pairs used by savePreferences,
+        # bound once so a save is a single loop over the table
+        self._local_server_fields = (("path", self.uiLocalServerPathLineEdit.text),
+                                     ("ubridge_path", self.uiUbridgePathLineEdit.text),
+                                     ("port", self.uiLocalServerPortSpinBox.value),
+                                     ("auto_start", self.uiLocalServerAutoStartCheckBox.isChecked),
+                                     ("allow_console_from_anywhere", self.uiConsoleConnectionsToAnyIPCheckBox.isChecked),
+                                     ("auth", self.uiLocalServerAuthCheckBox.isChecked),
+                                     ("console_start_port_range", self.uiConsoleStartPortSpinBox.value),
+                                     ("console_end_port_range", self.uiConsoleEndPortSpinBox.value),
+                                     ("udp_start_port_range", self.uiUDPStartPortSpinBox.value),
+                                     ("udp_end_port_range", self.uiUDPEndPortSpinBox.value))
 
     def _useLocalServerAutoStartSlot(self, state):
         """
@@ -108,7 +251,8 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
         if sys.platform.startswith("win"):
             filter = "Executable (*.exe);;All files (*.*)"
         server_path = shutil.which("gns3server")
-        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select the local server", server_path, filter)
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select the local server", server_path, filter,
+                                                        options=_FILE_DIALOG_OPTIONS)
         if not path:
             return
 
@@ -124,19 +268,19 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
             filter = "Executable (*.exe);;All files (*.*)"
 
         ubridge_path = shutil.which("ubridge")
-        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select ubridge executable", ubridge_path, filter)
+        path, _ = QtWidgets.QFileDialog.getOpenFileName(self, "Select ubridge executable", ubridge_path, filter,
+                                                        options=_FILE_DIALOG_OPTIONS)
         if not path:
             return
 
         self.uiUbridgePathLineEdit.setText(path)
 
-    def _remoteServerChangedSlot(self):
+    def _remoteServerChangedSlot(self, current=None, previous=None):
         """
         Enables the use of the delete button.
         """
 
-        item = self.uiRemoteServersTreeWidget.currentItem()
-        if item:
+        if self.uiRemoteServersTreeWidget.currentIndex().isValid():
             self.uiDeleteRemoteServerPushButton.setEnabled(True)
             self.uiUpdateRemoteServerPushButton.setEnabled(True)
         else:
@@ -151,30 +295,44 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
         dialog = EditComputeDialog(self.parent())
         dialog.show()
         if dialog.exec_():
-            self._remote_computes[dialog.compute().id()] = dialog.compute()
-            self._populateRemoteServersTree()
+            compute = dialog.compute()
+            self._remote_computes[compute.id()] = compute
+            self._remote_compute_keys.add((compute.host(), compute.port()))
+            self._remote_computes_model.addCompute(compute)
+            self.uiRemoteServersTreeWidget.resizeColumnToContents(0)
 
     def _remoteServerDeleteSlot(self):
         """
         Deletes a remote server.
         """
 
-        item = self.uiRemoteServersTreeWidget.currentItem()
-        if item:
-            del self._remote_computes[item.compute_id]
-            self.uiRemoteServersTreeWidget.takeTopLevelItem(self.uiRemoteServersTreeWidget.indexOfTopLevelItem(item))
+        index = self.uiRemoteServersTreeWidget.currentIndex()
+        if index.isValid():
+            compute = self._remote_computes_model.compute(index.row())
+            del self._remote_computes[compute.id()]
+            self._remote_computes_model.removeCompute(index.row())
+            self._updateRemoteComputeKeys()
 
     def _remoteServerUpdateSlot(self):
         """
         Update a remote server.
         """
 
-        item = self.uiRemoteServersTreeWidget.currentItem()
-        dialog = EditComputeDialog(self.parent(), item.compute)
+        index = self.uiRemoteServersTreeWidget.currentIndex()
+        if not index.isValid():
+            return
+        dialog = EditComputeDialog(self.parent(), self._remote_computes_model.compute(index.row()))
         dialog.show()
         if dialog.exec_():
             self._populateRemoteServersTree()
 
+    def _updateRemoteComputeKeys(self):
+        """
+        Rebuilds the (host, port) lookup set used for duplicate detection.
+        """
+
+        self._remote_compute_keys = {(compute.host(), compute.port()) for compute in self._remote_computes.values()}
+
     def _populateWidgets(self, servers_settings):
         """
         Populates the widgets with the settings.
@@ -182,54 +340,64 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
         :param servers_settings: servers settings
         """
 
-        self.uiLocalServerPathLineEdit.setText(servers_settings["path"])
-        self.uiUbridgePathLineEdit.setText(servers_settings["ubridge_path"])
-        index = self.uiLocalServerHostComboBox.findData(servers_settings["host"])
-        if index != -1:
-            self.uiLocalServerHostComboBox.setCurrentIndex(index)
-        self.uiLocalServerPortSpinBox.setValue(servers_settings["port"])
-
-        self.uiRemoteMainServerHostLineEdit.setText(servers_settings["host"])
-        self.uiRemoteMainServerPortSpinBox.setValue(servers_settings["port"])
-        self.uiRemoteMainServerUserLineEdit.setText(servers_settings["user"])
-        self.uiRemoteMainServerPasswordLineEdit.setText(servers_settings["password"])
-        self.uiRemoteMainServerAuthCheckBox.setChecked(servers_settings["auth"])
-
-        self.uiLocalServerAutoStartCheckBox.setChecked(servers_settings["auto_start"])
-        self._useLocalServerAutoStartSlot(servers_settings["auto_start"])
-
-        self.uiLocalServerAuthCheckBox.setChecked(servers_settings["auth"])
-        self.uiConsoleConnectionsToAnyIPCheckBox.setChecked(servers_settings["allow_console_from_anywhere"])
-        self.uiConsoleStartPortSpinBox.setValue(servers_settings["console_start_port_range"])
-        self.uiConsoleEndPortSpinBox.setValue(servers_settings["console_end_port_range"])
-        self.uiUDPStartPortSpinBox.setValue(servers_settings["udp_start_port_range"])
-        self.uiUDPEndPortSpinBox.setValue(servers_settings["udp_end_port_range"])
+        # suppress intermediate repaints and the stateChanged cascade,
+        # the group boxes are toggled once at the end
+        self.setUpdatesEnabled(False)
+        try:
+            self.uiLocalServerPathLineEdit.setText(servers_settings["path"])
+            self.uiUbridgePathLineEdit.setText(servers_settings["ubridge_path"])
+            index = self._host_index.get(servers_settings["host"], -1)
+            if index != -1:
+                self.uiLocalServerHostComboBox.setCurrentIndex(index)
+            self.uiLocalServerPortSpinBox.setValue(servers_settings["port"])
+
+            self.uiRemoteMainServerHostLineEdit.setText(servers_settings["host"])
+            self.uiRemoteMainServerPortSpinBox.setValue(servers_settings["port"])
+            self.uiRemoteMainServerUserLineEdit.setText(servers_settings["user"])
+            self.uiRemoteMainServerPasswordLineEdit.setText(servers_settings["password"])
+            self.uiRemoteMainServerAuthCheckBox.setChecked(servers_settings["auth"])
+
+            with QtCore.QSignalBlocker(self.uiLocalServerAutoStartCheckBox):
+                self.uiLocalServerAutoStartCheckBox.setChecked(servers_settings["auto_start"])
+            self._useLocalServerAutoStartSlot(servers_settings["auto_start"])
+
+            self.uiLocalServerAuthCheckBox.setChecked(servers_settings["auth"])
+            self.uiConsoleConnectionsToAnyIPCheckBox.setChecked(servers_settings["allow_console_from_anywhere"])
+            self.uiConsoleStartPortSpinBox.setValue(servers_settings["console_start_port_range"])
+            self.uiConsoleEndPortSpinBox.setValue(servers_settings["console_end_port_range"])
+            self.uiUDPStartPortSpinBox.setValue(servers_settings["udp_start_port_range"])
+            self.uiUDPEndPortSpinBox.setValue(servers_settings["udp_end_port_range"])
+        finally:
+            self.setUpdatesEnabled(True)
 
     def _populateRemoteServersTree(self):
-        self.uiRemoteServersTreeWidget.clear()
-        for compute in self._remote_computes.values():
-            item = QtWidgets.QTreeWidgetItem(self.uiRemoteServersTreeWidget)
-            item.setText(0, compute.name())
-            item.setText(1, compute.protocol())
-            item.setText(2, compute.host())
-            item.setText(3, str(compute.port()))
-            item.setText(4, compute.user())
-            item.compute = self._remote_computes[compute.id()]
-            item.compute_id = compute.id()
+
+        self._updateRemoteComputeKeys()
+        self._remote_computes_model.setComputes(self._remote_computes.values())
         self.uiRemoteServersTreeWidget.resizeColumnToContents(0)
         self._remoteServerChangedSlot()
 
-    def loadPreferences(self):
+    def showEvent(self, event):
+
+        super().showEvent(event)
+        self._loadRemoteComputesIfShown()
+
+    def _loadRemoteComputesIfShown(self, index=None):
         """
-        Loads the server preferences.
+        Populates the remote servers tab the first time it is actually
+        shown, so opening the preferences dialog does not pay for it.
         """
 
-        # Settings from the gns3_server.conf
-        local_server_settings = LocalServer.instance().localServerSettings()
-        self._populateWidgets(local_server_settings)
+        if not self._remotes_loaded and self.isVisible() and self.uiServerPreferenceTabWidget.currentWidget() == self.uiRemoteTabWidget:
+            self._loadRemoteComputes()
 
+    def _loadRemoteComputes(self):
+        """
+        Loads the remote server preferences.
+        """
+
+        self._remotes_loaded = True
         cm = ComputeManager.instance()
-        # load remote server preferences
         self._remote_computes.clear()
         for compute in cm.remoteComputes():
             # We copy to be able to detect the change with the original element
@@ -237,26 +405,36 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
             self._remote_computes[compute.id()] = copy.copy(compute)
         self._populateRemoteServersTree()
 
+    def loadPreferences(self):
+        """
+        Loads the server preferences.
+        """
+
+        # Settings from the gns3_server.conf
+        local_server_settings = LocalServer.instance().localServerSettings()
+        self._populateWidgets(local_server_settings)
+
+        # the remote servers are loaded lazily by _loadRemoteComputesIfShown
+        self._remotes_loaded = False
+        self._loadRemoteComputesIfShown()
+
     def savePreferences(self):
         """
         Saves the server preferences.
         """
 
-        local_server_settings = LocalServer.instance().localServerSettings()
+        # the remote computes must be known before saving since the
+        # updated list is pushed to the compute manager below
+        if not self._remotes_loaded:
+            self._loadRemoteComputes()
+
+        local_server = LocalServer.instance()
+        local_server_settings = local_server.localServerSettings()
 
         # save the local server preferences
         new_local_server_settings = local_server_settings.copy()
-        new_local_server_settings.update({"path": self.uiLocalServerPathLineEdit.text(),
-                                          "ubridge_path": self.uiUbridgePathLineEdit.text(),
-                                          "host": self.uiLocalServerHostComboBox.itemData(self.uiLocalServerHostComboBox.currentIndex()),
-                                          "port": self.uiLocalServerPortSpinBox.value(),
-                                          "auto_start": self.uiLocalServerAutoStartCheckBox.isChecked(),
-                                          "allow_console_from_anywhere": self.uiConsoleConnectionsToAnyIPCheckBox.isChecked(),
-                                          "auth": self.uiLocalServerAuthCheckBox.isChecked(),
-                                          "console_start_port_range": self.uiConsoleStartPortSpinBox.value(),
-                                          "console_end_port_range": self.uiConsoleEndPortSpinBox.value(),
-                                          "udp_start_port_range": self.uiUDPStartPortSpinBox.value(),
-                                          "udp_end_port_range": self.uiUDPEndPortSpinBox.value()})
+        new_local_server_settings.update({key: getter() for key, getter in self._local_server_fields})
+        new_local_server_settings["host"] = self.uiLocalServerHostComboBox.itemData(self.uiLocalServerHostComboBox.currentIndex())
 
         if new_local_server_settings["console_end_port_range"] <= new_local_server_settings["console_start_port_range"]:
             QtWidgets.QMessageBox.critical(self, "Port range", "Invalid console port range from {} to {}".format(new_local_server_settings["console_start_port_range"],
@@ -269,19 +447,26 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
             return
 
         if new_local_server_settings["auto_start"]:
-            if not os.path.isfile(new_local_server_settings["path"]):
+            # a single stat call is enough to check the path exists,
+            # is a regular file and is executable
+            try:
+                st = os.stat(new_local_server_settings["path"])
+            except OSError:
+                QtWidgets.QMessageBox.critical(self, "Local server", "Could not find local server {}".format(new_local_server_settings["path"]))
+                return
+            if not stat.S_ISREG(st.st_mode):
                 QtWidgets.QMessageBox.critical(self, "Local server", "Could not find local server {}".format(new_local_server_settings["path"]))
                 return
-            if not os.access(new_local_server_settings["path"], os.X_OK):
+            if not st.st_mode & 0o111:
                 QtWidgets.QMessageBox.critical(self, "Local server", "{} is not an executable".format(new_local_server_settings["path"]))
 
             if new_local_server_settings != local_server_settings:
                 # first check if we have nodes on the local server
                 topology = Topology.instance()
-                if len(topology.nodes()):
+                if topology.nodes():
                     QtWidgets.QMessageBox.critical(self, "Local server", "Please close your project or delete all the nodes running on the local server before changing the local server settings")
                     return
-                LocalServer.instance().updateLocalServerSettings(new_local_server_settings)
+                local_server.updateLocalServerSettings(new_local_server_settings)
         else:
             new_local_server_settings["host"] = self.uiRemoteMainServerHostLineEdit.text()
             new_local_server_settings["port"] = self.uiRemoteMainServerPortSpinBox.value()
@@ -292,11 +477,10 @@ class ServerPreferencesPage(QtWidgets.QWidget, Ui_ServerPreferencesPageWidget):
 
             # Some users get confused by remote server and  main server and same
             # configure the same server twice
-            for compute in self._remote_computes.values():
-                if new_local_server_settings["host"] == compute.host() and new_local_server_settings["port"] == compute.port():
-                    QtWidgets.QMessageBox.critical(self, "Local server", "You can't use a server as main server and as a remote server.")
-                    return
-            LocalServer.instance().updateLocalServerSettings(new_local_server_settings)
+            if (new_local_server_settings["host"], new_local_server_settings["port"]) in self._remote_compute_keys:
+                QtWidgets.QMessageBox.critical(self, "Local server", "You can't use a server as main server and as a remote server.")
+                return
+            local_server.updateLocalServerSettings(new_local_server_settings)
 
         ComputeManager.instance().updateList(self._remote_computes.values())
         self.loadPreferences()
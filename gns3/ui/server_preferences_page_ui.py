@@ -205,17 +205,14 @@ class Ui_ServerPreferencesPageWidget(object):
         self.gridLayout_5 = QtWidgets.QGridLayout(self.uiRemoteTabWidget)
         self.gridLayout_5.setContentsMargins(10, 10, 10, 10)
         self.gridLayout_5.setObjectName("gridLayout_5")
-        self.uiRemoteServersTreeWidget = QtWidgets.QTreeWidget(self.uiRemoteTabWidget)
+        self.uiRemoteServersTreeWidget = QtWidgets.QTreeView(self.uiRemoteTabWidget)
         sizePolicy = QtWidgets.QSizePolicy(QtWidgets.QSizePolicy.MinimumExpanding, QtWidgets.QSizePolicy.MinimumExpanding)
         sizePolicy.setHorizontalStretch(0)
         sizePolicy.setVerticalStretch(0)
         sizePolicy.setHeightForWidth(self.uiRemoteServersTreeWidget.sizePolicy().hasHeightForWidth())
         self.uiRemoteServersTreeWidget.setSizePolicy(sizePolicy)
-        self.uiRemoteServersTreeWidget.setColumnCount(5)
+        self.uiRemoteServersTreeWidget.setRootIsDecorated(False)
         self.uiRemoteServersTreeWidget.setObjectName("uiRemoteServersTreeWidget")
-        self.uiRemoteServersTreeWidget.headerItem().setText(1, "Protocol")
-        self.uiRemoteServersTreeWidget.headerItem().setText(2, "Host")
-        self.uiRemoteServersTreeWidget.headerItem().setText(3, "Port")
         self.gridLayout_5.addWidget(self.uiRemoteServersTreeWidget, 0, 0, 1, 2)
         self.horizontalLayout_3 = QtWidgets.QHBoxLayout()
         self.horizontalLayout_3.setObjectName("horizontalLayout_3")
@@ -296,8 +293,6 @@ class Ui_ServerPreferencesPageWidget(object):
         self.label_4.setText(_translate("ServerPreferencesPageWidget", "User:"))
         self.label_5.setText(_translate("ServerPreferencesPageWidget", "Password:"))
         self.uiServerPreferenceTabWidget.setTabText(self.uiServerPreferenceTabWidget.indexOf(self.uiLocalTabWidget), _translate("ServerPreferencesPageWidget", "Main server"))
-        self.uiRemoteServersTreeWidget.headerItem().setText(0, _translate("ServerPreferencesPageWidget", "Name"))
-        self.uiRemoteServersTreeWidget.headerItem().setText(4, _translate("ServerPreferencesPageWidget", "User"))
         self.uiAddRemoteServerPushButton.setText(_translate("ServerPreferencesPageWidget", "&Add"))
         self.uiUpdateRemoteServerPushButton.setText(_translate("ServerPreferencesPageWidget", "Edit"))
         self.uiDeleteRemoteServerPushButton.setText(_translate("ServerPreferencesPageWidget", "&Delete"))
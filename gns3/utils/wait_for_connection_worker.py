@@ -54,11 +54,15 @@ class WaitForConnectionWorker(QtCore.QObject):
         connection_success = False
         begin = time.time()
 
-        # try to connect for 30 seconds
+        # try to connect for 30 seconds, starting with quick retries and
+        # backing off so an unreachable server does not keep this worker
+        # busy-looping on refused connections
+        retry_delay = 0.01
         while time.time() - begin < 30.0:
             if not self._is_running:
                 return
-            time.sleep(0.01)
+            time.sleep(retry_delay)
+            retry_delay = min(retry_delay * 2, 0.5)
             sock = None
             try:
                 sock = socket.create_connection((self._host, self._port), timeout=10)